@@ -12,18 +12,21 @@ Routes:
 
 import hashlib
 import hmac
-import json
 import logging
 import os
 import sys
 import time
 import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from itertools import islice
 
 from flask import Flask, request, jsonify, render_template
 
 import violet_core
 import dead_letter
+import fastjson
 from notify import send_notification
 from salesforce_client import get_salesforce_credentials
 
@@ -45,7 +48,13 @@ log = logging.getLogger('app')
 # ══════════════════════════════════════════════════════════════════════
 # IN-MEMORY STATS (reset on restart — fine at this volume)
 # ══════════════════════════════════════════════════════════════════════
-_stats_lock = threading.Lock()
+MAX_RECENT_EVENTS = 50
+
+# Counters are bumped lock-free: under the GIL a lost increment is
+# vanishingly rare and these stats are best-effort anyway. The lock only
+# guards snapshotting recent_events while a writer is mid-append.
+_events_lock = threading.Lock()
+_start_monotonic = time.monotonic()  # uptime is one subtraction, no ISO parsing
 _stats = {
     'start_time': datetime.now(timezone.utc).isoformat(),
     'webhooks_received': 0,
@@ -55,42 +64,62 @@ _stats = {
     'errors': 0,
     'last_webhook': None,
     'last_created': None,
-    'recent_events': [],  # Last 50 events
+    'recent_events': deque(maxlen=MAX_RECENT_EVENTS),  # deque drops the oldest for us
 }
 
 RETELL_API_KEY = os.environ.get('RETELL_API_KEY', '')
-MAX_RECENT_EVENTS = 50
+MAX_RETRY_RESULTS = 200  # per-entry details kept in a retry-failed response
+RETRY_WORKERS = 8        # replay concurrency — bounded to respect SF API limits
 
 
-def _record_event(event_type, chat_id, detail):
-    """Thread-safe stats update."""
-    with _stats_lock:
-        _stats['webhooks_received'] += 1
-        _stats['last_webhook'] = datetime.now(timezone.utc).isoformat()
-
-        if event_type == 'created':
-            _stats['created'] += 1
-            _stats['last_created'] = datetime.now(timezone.utc).isoformat()
-        elif event_type == 'duplicate':
-            _stats['duplicates'] += 1
-        elif event_type == 'skip':
-            _stats['skipped'] += 1
-        elif event_type == 'error':
-            _stats['errors'] += 1
-
-        _stats['recent_events'].append({
-            'time': datetime.now(timezone.utc).strftime('%H:%M:%S'),
+def _record_outcome(event_type, chat_id, detail):
+    """Outcome counters + event feed.
+
+    Does NOT bump webhooks_received — the batched sync uses this as its
+    completion callback, and the receive was already counted at enqueue.
+    """
+    now = datetime.now(timezone.utc)
+
+    if event_type == 'created':
+        _stats['created'] += 1
+        _stats['last_created'] = now.isoformat()
+    elif event_type == 'duplicate':
+        _stats['duplicates'] += 1
+    elif event_type == 'skip':
+        _stats['skipped'] += 1
+    elif event_type == 'error':
+        _stats['errors'] += 1
+
+    # appendleft keeps the deque newest-first, so the dashboard reads it
+    # in display order without slicing or reversing.
+    with _events_lock:
+        _stats['recent_events'].appendleft({
+            'time': now.strftime('%H:%M:%S'),
             'type': event_type,
             'chat_id': chat_id[:12] + '...' if len(chat_id) > 12 else chat_id,
             'detail': str(detail)[:100],
         })
-        if len(_stats['recent_events']) > MAX_RECENT_EVENTS:
-            _stats['recent_events'] = _stats['recent_events'][-MAX_RECENT_EVENTS:]
+
+
+def _record_event(event_type, chat_id, detail):
+    """Thread-safe stats update for a freshly received webhook."""
+    _stats['webhooks_received'] += 1
+    _stats['last_webhook'] = datetime.now(timezone.utc).isoformat()
+    _record_outcome(event_type, chat_id, detail)
 
 
 # ══════════════════════════════════════════════════════════════════════
 # SIGNATURE VERIFICATION
 # ══════════════════════════════════════════════════════════════════════
+
+# The HMAC key schedule (two SHA-256 block compressions) is done once here;
+# each request copies the prepared state and just feeds it the body.
+_HMAC_PROTO = (
+    hmac.new(RETELL_API_KEY.encode('utf-8'), b'', hashlib.sha256)
+    if RETELL_API_KEY else None
+)
+
+
 def verify_retell_signature(payload_body, signature):
     """Verify RetellAI webhook signature using HMAC-SHA256.
 
@@ -108,13 +137,48 @@ def verify_retell_signature(payload_body, signature):
     if not signature:
         return False
 
-    expected = hmac.new(
-        RETELL_API_KEY.encode('utf-8'),
-        payload_body,
-        hashlib.sha256,
-    ).hexdigest()
+    # Compare the raw 32-byte digests — skips the hexdigest encoding pass
+    # and halves the compare length. Still constant-time via compare_digest.
+    try:
+        sig_bytes = bytes.fromhex(signature)
+    except ValueError:
+        return False
+
+    mac = _HMAC_PROTO.copy()
+    mac.update(payload_body)
 
-    return hmac.compare_digest(expected, signature)
+    return hmac.compare_digest(mac.digest(), sig_bytes)
+
+
+# ══════════════════════════════════════════════════════════════════════
+# SALESFORCE PROBE CACHE
+# ══════════════════════════════════════════════════════════════════════
+SF_PROBE_TTL = 30  # seconds
+
+_sf_probe_cache = {'at': 0.0, 'result': (False, 'not checked yet')}
+
+
+def _probe_salesforce():
+    """Cached (sf_ok, sf_detail) connectivity check.
+
+    Monitoring polls /health every few seconds — without a TTL each poll
+    serializes on the credential cache. No lock here: a stale read at the
+    TTL boundary just means a couple of probes recompute, which is harmless.
+    """
+    if time.monotonic() - _sf_probe_cache['at'] < SF_PROBE_TTL:
+        return _sf_probe_cache['result']
+
+    sf_ok = False
+    try:
+        token, url = get_salesforce_credentials()
+        sf_ok = bool(token and url)
+        detail = url if sf_ok else 'no credentials'
+    except Exception as e:
+        detail = str(e)[:200]
+
+    _sf_probe_cache['result'] = (sf_ok, detail)
+    _sf_probe_cache['at'] = time.monotonic()
+    return sf_ok, detail
 
 
 # ══════════════════════════════════════════════════════════════════════
@@ -132,10 +196,10 @@ def webhook_retell():
         log.warning("Invalid webhook signature — rejected")
         return '', 401
 
-    # 2. Parse payload
+    # 2. Parse payload (orjson takes the raw bytes directly — no decode pass)
     try:
-        payload = json.loads(raw_body)
-    except json.JSONDecodeError:
+        payload = fastjson.loads(raw_body)
+    except ValueError:
         log.warning("Invalid JSON in webhook body")
         return '', 400
 
@@ -150,21 +214,17 @@ def webhook_retell():
 
     log.info(f"[{chat_id[:12]}] Received chat_analyzed webhook")
 
-    # 4. Process through core pipeline
+    # 4. Hand off to the core pipeline — skips resolve inline, everything
+    # else is queued for the batched SF sync. Errors (and dead-lettering)
+    # are handled by the flusher, which reports back via _record_outcome.
     try:
-        result = violet_core.process_chat_webhook(
+        result = violet_core.enqueue_chat_webhook(
             chat,
             notify_fn=send_notification,
+            record_fn=_record_outcome,
         )
 
-        action = result.get('action', 'unknown')
-        detail = result.get('detail', '')
-
-        _record_event(action, chat_id, detail)
-
-        # If SF create failed, save to dead letter
-        if action == 'error':
-            dead_letter.append(chat, result, detail)
+        _record_event(result.get('action', 'unknown'), chat_id, result.get('detail', ''))
 
     except Exception as e:
         log.exception(f"[{chat_id[:12]}] Unhandled error processing webhook")
@@ -178,17 +238,9 @@ def webhook_retell():
 @app.route('/health', methods=['GET'])
 def health():
     """Health check — verifies SF connectivity and returns uptime."""
-    sf_ok = False
-    sf_detail = ''
-    try:
-        token, url = get_salesforce_credentials()
-        sf_ok = bool(token and url)
-        sf_detail = url if sf_ok else 'no credentials'
-    except Exception as e:
-        sf_detail = str(e)[:200]
+    sf_ok, sf_detail = _probe_salesforce()
 
-    start = datetime.fromisoformat(_stats['start_time'])
-    uptime_seconds = (datetime.now(timezone.utc) - start).total_seconds()
+    uptime_seconds = time.monotonic() - _start_monotonic
 
     return jsonify({
         'status': 'healthy' if sf_ok else 'degraded',
@@ -207,27 +259,29 @@ def health():
     })
 
 
-@app.route('/status', methods=['GET'])
-def status():
-    """HTML dashboard showing service stats."""
-    start = datetime.fromisoformat(_stats['start_time'])
-    uptime_seconds = (datetime.now(timezone.utc) - start).total_seconds()
+STATUS_CACHE_TTL = 2  # seconds — matches how fast the stats move
+
+_status_cache = {'at': 0.0, 'html': '', 'etag': ''}
+
+
+def _render_status():
+    """Render the dashboard HTML (the uncached Jinja path)."""
+    uptime_seconds = time.monotonic() - _start_monotonic
 
     hours = int(uptime_seconds // 3600)
     minutes = int((uptime_seconds % 3600) // 60)
     uptime_str = f"{hours}h {minutes}m"
 
-    sf_ok = False
-    sf_instance = ''
-    try:
-        token, url = get_salesforce_credentials()
-        sf_ok = bool(token and url)
-        sf_instance = url
-    except Exception:
-        pass
+    sf_ok, sf_detail = _probe_salesforce()
+    sf_instance = sf_detail if sf_ok else ''
 
     dl_count = dead_letter.count()
 
+    # Snapshot under the lock — iterating a deque while a webhook
+    # thread appendleft()s raises RuntimeError.
+    with _events_lock:
+        recent = list(islice(_stats['recent_events'], 20))
+
     return render_template('status.html',
         uptime=uptime_str,
         sf_connected=sf_ok,
@@ -240,52 +294,89 @@ def status():
         dead_letter_count=dl_count,
         last_webhook=_stats['last_webhook'] or 'never',
         last_created=_stats['last_created'] or 'never',
-        recent_events=list(reversed(_stats['recent_events'][-20:])),
+        recent_events=recent,
     )
 
 
+@app.route('/status', methods=['GET'])
+def status():
+    """HTML dashboard showing service stats.
+
+    The rendered page is memoized for STATUS_CACHE_TTL seconds and served
+    with an ETag, so a frequently-polled dashboard mostly gets 304s (or a
+    cached body) instead of a Jinja render per hit.
+    """
+    if time.monotonic() - _status_cache['at'] >= STATUS_CACHE_TTL:
+        html = _render_status()
+        _status_cache['html'] = html
+        _status_cache['etag'] = '"' + hashlib.md5(html.encode('utf-8')).hexdigest() + '"'
+        _status_cache['at'] = time.monotonic()
+
+    etag = _status_cache['etag']
+    if request.headers.get('If-None-Match') == etag:
+        return '', 304, {'ETag': etag}
+
+    return _status_cache['html'], 200, {'ETag': etag, 'Content-Type': 'text/html; charset=utf-8'}
+
+
+def _replay_one(entry):
+    """Replay a single dead-letter entry. Returns (chat_id, action, detail)."""
+    chat = entry.get('chat_payload', {})
+    chat_id = entry.get('chat_id', 'unknown')
+
+    try:
+        result = violet_core.process_chat_webhook(
+            chat,
+            notify_fn=send_notification,
+        )
+        action = result.get('action')
+        detail = result.get('detail')
+        _record_event(action or 'retry', chat_id, detail or '')
+    except Exception as e:
+        action = 'error'
+        detail = str(e)[:200]
+
+    return chat_id, action, detail
+
+
 @app.route('/api/retry-failed', methods=['POST'])
 def retry_failed():
     """Replay all entries in the dead letter queue."""
-    entries = dead_letter.read_all()
-    if not entries:
+    if dead_letter.count() == 0:
         return jsonify({'message': 'Dead letter queue is empty', 'retried': 0})
 
-    results = []
-    for entry in entries:
-        chat = entry.get('chat_payload', {})
-        chat_id = entry.get('chat_id', 'unknown')
-
-        try:
-            result = violet_core.process_chat_webhook(
-                chat,
-                notify_fn=send_notification,
-            )
-            results.append({
-                'chat_id': chat_id,
-                'action': result.get('action'),
-                'detail': result.get('detail'),
-            })
-            _record_event(result.get('action', 'retry'), chat_id, result.get('detail', ''))
-        except Exception as e:
-            results.append({
-                'chat_id': chat_id,
-                'action': 'error',
-                'detail': str(e)[:200],
-            })
+    retried = 0
+    created = 0
+    failed = 0
+    # Stream entries one line at a time — a large backlog never sits in RAM.
+    # Per-entry details are capped to the most recent MAX_RETRY_RESULTS.
+    results = deque(maxlen=MAX_RETRY_RESULTS)
+
+    # The work is SF-bound network I/O, so replay entries concurrently —
+    # the workers share the pooled session's keepalive connections.
+    # map() over the whole generator would submit every entry up front
+    # and pull the full backlog into RAM, so consume it in bounded
+    # windows: enough to keep the workers busy, no more.
+    entries = dead_letter.iter_entries()
+    with ThreadPoolExecutor(max_workers=RETRY_WORKERS) as ex:
+        while window := list(islice(entries, RETRY_WORKERS * 2)):
+            for chat_id, action, detail in ex.map(_replay_one, window):
+                retried += 1
+                if action == 'created':
+                    created += 1
+                elif action == 'error':
+                    failed += 1
+                results.append({'chat_id': chat_id, 'action': action, 'detail': detail})
 
     # Clear the dead letter queue (successes and new failures will be handled fresh)
     archive_path, cleared = dead_letter.clear()
 
-    created = sum(1 for r in results if r['action'] == 'created')
-    failed = sum(1 for r in results if r['action'] == 'error')
-
     return jsonify({
-        'retried': len(results),
+        'retried': retried,
         'created': created,
         'failed': failed,
         'archived': archive_path,
-        'results': results,
+        'results': list(results),
     })
 
 
@@ -4,24 +4,53 @@ Ensures no lead is ever lost, even if Salesforce is down.
 Stores failed records in dead_letter.jsonl for replay via /api/retry-failed.
 """
 
-import json
+import atexit
+import logging
 import os
+import queue
 import shutil
 import threading
+import time
 from datetime import datetime, timezone
 
+import fastjson
+
+log = logging.getLogger('dead_letter')
+
 DEAD_LETTER_FILE = 'dead_letter.jsonl'
+WRITE_RETRY_DELAY = 1.0  # seconds to back off after a failed disk write
+WRITE_BATCH_SIZE = 100
 _lock = threading.Lock()
 
 
+def _count_lines():
+    """One-time scan of the queue file (import only — count() is O(1) after)."""
+    if not os.path.exists(DEAD_LETTER_FILE):
+        return 0
+    n = 0
+    with open(DEAD_LETTER_FILE, 'rb') as f:
+        for line in f:
+            if line.strip():
+                n += 1
+    return n
+
+
+_count = _count_lines()
+
+
 def append(chat, record, error):
     """Append a failed record to the dead letter queue.
 
+    Non-blocking: the entry is queued and a background thread batches
+    writes to disk, so webhook handlers never wait on file I/O during a
+    burst of SF failures.
+
     Args:
         chat: Full chat payload from RetellAI
         record: The record we attempted to create
         error: Error message or details
     """
+    global _count
     entry = {
         'timestamp': datetime.now(timezone.utc).isoformat(),
         'chat_id': chat.get('chat_id', 'unknown'),
@@ -33,45 +62,143 @@ def append(chat, record, error):
         'chat_payload': chat,
     }
 
+    _write_q.put(entry)
     with _lock:
-        with open(DEAD_LETTER_FILE, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(entry, default=str) + '\n')
+        _count += 1
 
 
-def read_all():
-    """Read all entries from the dead letter queue.
+def _write_entries(entries):
+    """Single batched write + fsync for a group of entries."""
+    with _lock:
+        with open(DEAD_LETTER_FILE, 'ab') as f:
+            f.writelines(fastjson.dumps(e, default=str) + b'\n' for e in entries)
+            f.flush()
+            os.fsync(f.fileno())
 
-    Returns:
-        list of dicts, one per failed record
+
+def _writer_loop():
+    """Daemon thread: block for one entry, then drain up to a batch.
+
+    A failed write must not kill the thread or drop the batch — the
+    whole point of this module is that no lead is ever lost. On error
+    the batch is re-queued and retried after a short back-off (disk
+    full and EIO are usually transient).
+    """
+    while True:
+        entries = [_write_q.get()]
+        while len(entries) < WRITE_BATCH_SIZE:
+            try:
+                entries.append(_write_q.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            _write_entries(entries)
+        except Exception:
+            log.exception("Dead-letter write failed — re-queueing %d entries", len(entries))
+            # Re-queue before task_done so flush()'s join() never sees
+            # the queue as settled while these entries are off disk.
+            for e in entries:
+                _write_q.put(e)
+            time.sleep(WRITE_RETRY_DELAY)
+        finally:
+            for _ in entries:
+                _write_q.task_done()
+
+
+def flush():
+    """Synchronously drain any queued entries to disk.
+
+    Called before reads/clears so no entry is only in memory, and at
+    interpreter shutdown so nothing is lost on a clean exit. Besides
+    draining the queue, this joins it — an entry the writer thread has
+    already popped but not yet written is still an unfinished task, so
+    flush() returning means every prior append() is on disk.
     """
     entries = []
+    while True:
+        try:
+            entries.append(_write_q.get_nowait())
+        except queue.Empty:
+            break
+    if entries:
+        try:
+            _write_entries(entries)
+        finally:
+            for _ in entries:
+                _write_q.task_done()
+    _write_q.join()
+
+
+_write_q = queue.Queue()
+_writer = threading.Thread(target=_writer_loop, name='dead-letter-writer', daemon=True)
+_writer.start()
+atexit.register(flush)
+
+
+def iter_entries(chunk_size=100):
+    """Yield entries one at a time without loading the whole file into RAM.
+
+    Lines are read in chunks of `chunk_size` under the lock, and parsed
+    outside it, so concurrent append() calls are not starved during a
+    long replay.
+    """
+    flush()
     if not os.path.exists(DEAD_LETTER_FILE):
-        return entries
-
-    with _lock:
-        with open(DEAD_LETTER_FILE, 'r', encoding='utf-8') as f:
-            for line in f:
+        return
+
+    with open(DEAD_LETTER_FILE, 'rb') as f:
+        eof = False
+        while not eof:
+            chunk = []
+            with _lock:
+                for _ in range(chunk_size):
+                    line = f.readline()
+                    if not line:
+                        eof = True
+                        break
+                    chunk.append(line)
+
+            for line in chunk:
                 line = line.strip()
                 if line:
                     try:
-                        entries.append(json.loads(line))
-                    except json.JSONDecodeError:
+                        yield fastjson.loads(line)
+                    except ValueError:
                         continue
-    return entries
+
+
+def read_all():
+    """Read all entries from the dead letter queue.
+
+    Returns:
+        list of dicts, one per failed record
+    """
+    return list(iter_entries())
 
 
 def count():
-    """Return the number of entries in the dead letter queue."""
-    if not os.path.exists(DEAD_LETTER_FILE):
-        return 0
+    """Return the number of entries in the dead letter queue.
+
+    _count only sees this process's appends, but gunicorn runs several
+    workers over one shared file — so it is a hint, and emptiness is
+    always confirmed against the file: a worker whose counter says zero
+    rescans in case siblings appended, and a worker whose counter says
+    nonzero resets when a sibling's clear() emptied the file. The common
+    steady-state call is still one stat(), not a file scan.
+    """
+    global _count
+    flush()
+    try:
+        size = os.path.getsize(DEAD_LETTER_FILE)
+    except OSError:
+        size = 0
 
-    n = 0
     with _lock:
-        with open(DEAD_LETTER_FILE, 'r', encoding='utf-8') as f:
-            for line in f:
-                if line.strip():
-                    n += 1
-    return n
+        if size == 0:
+            _count = 0
+        elif _count == 0:
+            _count = _count_lines()
+        return _count
 
 
 def clear():
@@ -80,17 +207,15 @@ def clear():
     Returns:
         (archived_path, entry_count) or (None, 0) if nothing to clear
     """
+    global _count
+    flush()
     if not os.path.exists(DEAD_LETTER_FILE):
         return None, 0
 
     with _lock:
-        # Count entries
-        n = 0
-        with open(DEAD_LETTER_FILE, 'r', encoding='utf-8') as f:
-            for line in f:
-                if line.strip():
-                    n += 1
-
+        # Count from the file, not the in-process counter — siblings in
+        # other gunicorn workers may have appended entries we never saw.
+        n = _count_lines()
         if n == 0:
             return None, 0
 
@@ -98,5 +223,6 @@ def clear():
         ts = datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')
         archive_path = f'dead_letter_archive_{ts}.jsonl'
         shutil.move(DEAD_LETTER_FILE, archive_path)
+        _count = 0
 
     return archive_path, n
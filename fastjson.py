@@ -0,0 +1,29 @@
+"""Fast JSON helpers — orjson when available, stdlib fallback otherwise.
+
+orjson is a C implementation that parses/serializes 3-10x faster than the
+stdlib and works bytes-in/bytes-out, which matters on the hot webhook path
+and during bulk dead-letter replays. `dumps` always returns bytes so callers
+can write straight to binary files/sockets regardless of which backend is
+active.
+
+Usage:
+    from fastjson import dumps, loads
+"""
+
+try:
+    import orjson
+
+    def dumps(obj, default=None):
+        """Serialize obj to JSON bytes."""
+        return orjson.dumps(obj, default=default)
+
+    loads = orjson.loads
+
+except ImportError:
+    import json
+
+    def dumps(obj, default=None):
+        """Serialize obj to JSON bytes (stdlib fallback)."""
+        return json.dumps(obj, default=default).encode('utf-8')
+
+    loads = json.loads
@@ -9,10 +9,20 @@ import logging
 import os
 import requests
 
+import fastjson
+
 log = logging.getLogger('notify')
 
 SLACK_WEBHOOK_URL = os.environ.get('SLACK_WEBHOOK_URL', '')
 
+# Pooled session so repeat Slack posts reuse one TLS connection.
+_session = requests.Session()
+_session.mount('https://', requests.adapters.HTTPAdapter(pool_maxsize=4))
+
+# Constant pieces of the Slack message, built once instead of per event.
+_SLACK_HEADERS = {'Content-Type': 'application/json'}
+_SLACK_BUTTON_TEXT = {"type": "plain_text", "text": "View in Salesforce"}
+
 
 def send_notification(event_type, details):
     """Dispatch a notification for a webhook event.
@@ -79,7 +89,7 @@ def _send_slack(event_type, details):
                 "elements": [
                     {
                         "type": "button",
-                        "text": {"type": "plain_text", "text": "View in Salesforce"},
+                        "text": _SLACK_BUTTON_TEXT,
                         "url": sf_link,
                         "style": "primary"
                     }
@@ -96,7 +106,13 @@ def _send_slack(event_type, details):
         return
 
     try:
-        resp = requests.post(SLACK_WEBHOOK_URL, json=payload, timeout=10)
+        # Serialize ourselves — skips requests' internal json.dumps pass.
+        resp = _session.post(
+            SLACK_WEBHOOK_URL,
+            data=fastjson.dumps(payload),
+            headers=_SLACK_HEADERS,
+            timeout=10,
+        )
         if resp.status_code != 200:
             log.warning(f"Slack notification failed: {resp.status_code}")
     except Exception as e:
@@ -27,11 +27,23 @@ Usage:
 import os
 import logging
 import threading
+import time
 import requests
-from datetime import datetime
+from requests.adapters import HTTPAdapter, Retry
 
 log = logging.getLogger("sf_client")
 
+# One pooled session per process. Keepalive means one TLS handshake per
+# Salesforce host for the process lifetime instead of one per call.
+# Retry only covers idempotent methods by default, so POSTed creates are
+# never silently re-sent.
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504]),
+))
+
 _cached_token = None
 _cached_instance = None
 _token_fetched_at = None
@@ -41,6 +53,22 @@ SF_API_VERSION = "v59.0"
 SF_REQUEST_TIMEOUT = int(os.environ.get("SF_REQUEST_TIMEOUT", 30))
 SF_TOKEN_CACHE_TTL = int(os.environ.get("SF_TOKEN_CACHE_TTL", 1800))
 
+# Credentials config is snapshotted once at import — it never changes at
+# runtime, so per-call mode dispatch is plain global reads instead of
+# repeated os.environ lookups.
+_SF_ACCESS_TOKEN = os.environ.get("SF_ACCESS_TOKEN")
+_SF_INSTANCE_URL = os.environ.get("SF_INSTANCE_URL")
+_SF_CLIENT_ID = os.environ.get("SF_CLIENT_ID")
+_SF_CLIENT_SECRET = os.environ.get("SF_CLIENT_SECRET")
+_SF_REFRESH_TOKEN = os.environ.get("SF_REFRESH_TOKEN")
+_SF_USERNAME = os.environ.get("SF_USERNAME")
+_SF_PASSWORD = os.environ.get("SF_PASSWORD", "")
+_SF_SECURITY_TOKEN = os.environ.get("SF_SECURITY_TOKEN", "")
+_SF_LOGIN_URL = os.environ.get("SF_LOGIN_URL")
+_REPLIT_CONNECTORS_HOSTNAME = os.environ.get("REPLIT_CONNECTORS_HOSTNAME")
+_REPL_IDENTITY = os.environ.get("REPL_IDENTITY")
+_WEB_REPL_RENEWAL = os.environ.get("WEB_REPL_RENEWAL")
+
 
 # ===========================================================================
 # Auth Mode Implementations
@@ -48,21 +76,19 @@ SF_TOKEN_CACHE_TTL = int(os.environ.get("SF_TOKEN_CACHE_TTL", 1800))
 
 def _refresh_via_connector():
     """Mode 2: Fetch credentials via Replit's internal connector API."""
-    hostname = os.environ.get("REPLIT_CONNECTORS_HOSTNAME")
-    repl_identity = os.environ.get("REPL_IDENTITY")
-    web_repl = os.environ.get("WEB_REPL_RENEWAL")
-
-    if repl_identity:
-        token = "repl " + repl_identity
-    elif web_repl:
-        token = "depl " + web_repl
+    hostname = _REPLIT_CONNECTORS_HOSTNAME
+
+    if _REPL_IDENTITY:
+        token = "repl " + _REPL_IDENTITY
+    elif _WEB_REPL_RENEWAL:
+        token = "depl " + _WEB_REPL_RENEWAL
     else:
         return None, None
 
     if not hostname:
         return None, None
 
-    resp = requests.get(
+    resp = _session.get(
         f"https://{hostname}/api/v2/connection?include_secrets=true&connector_names=salesforce",
         headers={"Accept": "application/json", "X-Replit-Token": token},
         timeout=SF_REQUEST_TIMEOUT,
@@ -83,17 +109,17 @@ def _refresh_via_connector():
 
 def _refresh_via_oauth():
     """Mode 3: Authenticate using a refresh token (recommended)."""
-    client_id = os.environ.get("SF_CLIENT_ID")
-    client_secret = os.environ.get("SF_CLIENT_SECRET")
-    refresh_token = os.environ.get("SF_REFRESH_TOKEN")
-    login_url = os.environ.get("SF_LOGIN_URL", "https://surestaff.my.salesforce.com")
+    client_id = _SF_CLIENT_ID
+    client_secret = _SF_CLIENT_SECRET
+    refresh_token = _SF_REFRESH_TOKEN
+    login_url = _SF_LOGIN_URL or "https://surestaff.my.salesforce.com"
 
     if not all([client_id, client_secret, refresh_token]):
         raise RuntimeError(
             "Refresh Token mode requires: SF_CLIENT_ID, SF_CLIENT_SECRET, SF_REFRESH_TOKEN"
         )
 
-    resp = requests.post(f"{login_url}/services/oauth2/token", data={
+    resp = _session.post(f"{login_url}/services/oauth2/token", data={
         "grant_type": "refresh_token",
         "refresh_token": refresh_token,
         "client_id": client_id,
@@ -105,17 +131,18 @@ def _refresh_via_oauth():
         raise RuntimeError(f"Salesforce refresh token auth failed ({resp.status_code}): {error_detail}")
 
     data = resp.json()
+    log.info(f"Authenticated via refresh token: {data['instance_url']}")
     return data["access_token"], data["instance_url"]
 
 
 def _refresh_via_password():
     """Mode 4: Authenticate via OAuth 2.0 Username-Password flow."""
-    client_id = os.environ.get("SF_CLIENT_ID")
-    client_secret = os.environ.get("SF_CLIENT_SECRET")
-    username = os.environ.get("SF_USERNAME")
-    password = os.environ.get("SF_PASSWORD", "")
-    security_token = os.environ.get("SF_SECURITY_TOKEN", "")
-    login_url = os.environ.get("SF_LOGIN_URL", "https://login.salesforce.com")
+    client_id = _SF_CLIENT_ID
+    client_secret = _SF_CLIENT_SECRET
+    username = _SF_USERNAME
+    password = _SF_PASSWORD
+    security_token = _SF_SECURITY_TOKEN
+    login_url = _SF_LOGIN_URL or "https://login.salesforce.com"
 
     if not all([client_id, client_secret, username]):
         raise RuntimeError(
@@ -123,7 +150,7 @@ def _refresh_via_password():
             "SF_PASSWORD, SF_SECURITY_TOKEN"
         )
 
-    resp = requests.post(f"{login_url}/services/oauth2/token", data={
+    resp = _session.post(f"{login_url}/services/oauth2/token", data={
         "grant_type": "password",
         "client_id": client_id,
         "client_secret": client_secret,
@@ -136,9 +163,73 @@ def _refresh_via_password():
         raise RuntimeError(f"Salesforce OAuth failed ({resp.status_code}): {error_detail}")
 
     data = resp.json()
+    log.info(f"Authenticated via username-password: {data['instance_url']}")
     return data["access_token"], data["instance_url"]
 
 
+def _refresh_via_token_env():
+    """Mode 1: Pre-existing token straight from the environment."""
+    log.debug("Using Token mode (SF_ACCESS_TOKEN)")
+    return _SF_ACCESS_TOKEN, _SF_INSTANCE_URL
+
+
+def _refresh_via_connector_checked():
+    """Mode 2: Connector credentials, validated, with OAuth fallback."""
+    try:
+        token, instance = _refresh_via_connector()
+        if token and instance:
+            test_resp = _session.get(
+                f"{instance}/services/data/{SF_API_VERSION}/limits",
+                headers={"Authorization": f"Bearer {token}"},
+                timeout=SF_REQUEST_TIMEOUT,
+            )
+            if test_resp.status_code == 200:
+                log.info(f"Authenticated via connector: {instance}")
+                return token, instance
+            log.warning("Connector token invalid, falling back to OAuth")
+    except Exception as e:
+        log.warning(f"Connector auth failed ({e}), falling back to OAuth")
+    return _pick_fallback()()
+
+
+def _refresh_unconfigured():
+    raise RuntimeError(
+        "No Salesforce credentials configured. Set one of:\n"
+        "  A) SF_ACCESS_TOKEN + SF_INSTANCE_URL (token mode)\n"
+        "  B) REPLIT_CONNECTORS_HOSTNAME (Replit mode)\n"
+        "  C) SF_CLIENT_ID + SF_CLIENT_SECRET + SF_REFRESH_TOKEN (refresh token — recommended)\n"
+        "  D) SF_CLIENT_ID + SF_CLIENT_SECRET + SF_USERNAME + SF_PASSWORD + SF_SECURITY_TOKEN (direct OAuth)"
+    )
+
+
+def _pick_fallback():
+    """OAuth mode used when the connector path is unavailable or fails."""
+    if _SF_REFRESH_TOKEN and _SF_CLIENT_ID:
+        return _refresh_via_oauth
+    if _SF_CLIENT_ID and _SF_USERNAME:
+        return _refresh_via_password
+    return _refresh_unconfigured
+
+
+def _pick_mode():
+    """Resolve the auth mode once at import — the env never changes at runtime.
+
+    Same priority order as before:
+      1. Token mode (SF_ACCESS_TOKEN set) — fastest, no auth call
+      2. Replit connector (REPLIT_CONNECTORS_HOSTNAME set) — inside Replit
+      3. Refresh token (SF_REFRESH_TOKEN + SF_CLIENT_ID) — recommended
+      4. Username-Password (SF_CLIENT_ID + SF_USERNAME) — legacy
+    """
+    if _SF_ACCESS_TOKEN and _SF_INSTANCE_URL:
+        return _refresh_via_token_env
+    if _REPLIT_CONNECTORS_HOSTNAME and (_REPL_IDENTITY or _WEB_REPL_RENEWAL):
+        return _refresh_via_connector_checked
+    return _pick_fallback()
+
+
+_refresh_fn = _pick_mode()
+
+
 # ===========================================================================
 # Main credential function (with token caching)
 # ===========================================================================
@@ -146,73 +237,28 @@ def _refresh_via_password():
 def get_salesforce_credentials():
     """Returns (access_token, instance_url) using whichever auth method is available.
 
-    Priority:
-      1. Token mode (SF_ACCESS_TOKEN set) — fastest, no auth call
-      2. Replit connector (REPLIT_CONNECTORS_HOSTNAME set) — inside Replit
-      3. Refresh token (SF_REFRESH_TOKEN + SF_CLIENT_ID) — recommended
-      4. Username-Password (SF_CLIENT_ID + SF_USERNAME) — legacy
+    The auth mode is resolved once at import (see _pick_mode); this
+    function is just cache check → _refresh_fn() → cache store.
     """
     global _cached_token, _cached_instance, _token_fetched_at
 
+    # Lock-free fast path: these reads are atomic under the GIL, so a fresh
+    # cached token is returned without ever touching the lock.
+    token, instance, fetched = _cached_token, _cached_instance, _token_fetched_at
+    if token and fetched and time.monotonic() - fetched < SF_TOKEN_CACHE_TTL:
+        return token, instance
+
     with _token_lock:
+        # Re-check under the lock — another thread may have refreshed already.
         if _cached_token and _token_fetched_at:
-            age = (datetime.now() - _token_fetched_at).total_seconds()
-            if age < SF_TOKEN_CACHE_TTL:
+            if time.monotonic() - _token_fetched_at < SF_TOKEN_CACHE_TTL:
                 return _cached_token, _cached_instance
 
-        # --- Mode 1: Pre-existing token ---
-        if os.environ.get("SF_ACCESS_TOKEN") and os.environ.get("SF_INSTANCE_URL"):
-            log.debug("Using Token mode (SF_ACCESS_TOKEN)")
-            _cached_token = os.environ["SF_ACCESS_TOKEN"]
-            _cached_instance = os.environ["SF_INSTANCE_URL"]
-            _token_fetched_at = datetime.now()
-            return _cached_token, _cached_instance
-
-        # --- Mode 2: Replit connector ---
-        try:
-            token, instance = _refresh_via_connector()
-            if token and instance:
-                test_resp = requests.get(
-                    f"{instance}/services/data/{SF_API_VERSION}/limits",
-                    headers={"Authorization": f"Bearer {token}"},
-                    timeout=SF_REQUEST_TIMEOUT,
-                )
-                if test_resp.status_code == 200:
-                    _cached_token = token
-                    _cached_instance = instance
-                    _token_fetched_at = datetime.now()
-                    log.info(f"Authenticated via connector: {instance}")
-                    return token, instance
-                else:
-                    log.warning("Connector token invalid, falling back to OAuth")
-        except Exception as e:
-            log.warning(f"Connector auth failed ({e}), falling back to OAuth")
-
-        # --- Mode 3: Refresh token (recommended) ---
-        if os.environ.get("SF_REFRESH_TOKEN") and os.environ.get("SF_CLIENT_ID"):
-            token, instance = _refresh_via_oauth()
-            _cached_token = token
-            _cached_instance = instance
-            _token_fetched_at = datetime.now()
-            log.info(f"Authenticated via refresh token: {instance}")
-            return token, instance
-
-        # --- Mode 4: Username-Password ---
-        if os.environ.get("SF_CLIENT_ID") and os.environ.get("SF_USERNAME"):
-            token, instance = _refresh_via_password()
-            _cached_token = token
-            _cached_instance = instance
-            _token_fetched_at = datetime.now()
-            log.info(f"Authenticated via username-password: {instance}")
-            return token, instance
-
-        raise RuntimeError(
-            "No Salesforce credentials configured. Set one of:\n"
-            "  A) SF_ACCESS_TOKEN + SF_INSTANCE_URL (token mode)\n"
-            "  B) REPLIT_CONNECTORS_HOSTNAME (Replit mode)\n"
-            "  C) SF_CLIENT_ID + SF_CLIENT_SECRET + SF_REFRESH_TOKEN (refresh token — recommended)\n"
-            "  D) SF_CLIENT_ID + SF_CLIENT_SECRET + SF_USERNAME + SF_PASSWORD + SF_SECURITY_TOKEN (direct OAuth)"
-        )
+        token, instance = _refresh_fn()
+        _cached_token = token
+        _cached_instance = instance
+        _token_fetched_at = time.monotonic()
+        return token, instance
 
 
 def _invalidate_token_cache():
@@ -230,7 +276,7 @@ def sf_api_get(path):
     """GET request to Salesforce REST API with 401 auto-retry."""
     access_token, instance_url = get_salesforce_credentials()
     url = f"{instance_url}/services/data/{SF_API_VERSION}{path}"
-    resp = requests.get(url, headers={
+    resp = _session.get(url, headers={
         "Authorization": f"Bearer {access_token}",
         "Content-Type": "application/json",
     }, timeout=SF_REQUEST_TIMEOUT)
@@ -238,7 +284,7 @@ def sf_api_get(path):
         _invalidate_token_cache()
         access_token, instance_url = get_salesforce_credentials()
         url = f"{instance_url}/services/data/{SF_API_VERSION}{path}"
-        resp = requests.get(url, headers={
+        resp = _session.get(url, headers={
             "Authorization": f"Bearer {access_token}",
             "Content-Type": "application/json",
         }, timeout=SF_REQUEST_TIMEOUT)
@@ -250,7 +296,7 @@ def sf_api_post(path, body):
     """POST request to Salesforce REST API with 401 auto-retry."""
     access_token, instance_url = get_salesforce_credentials()
     url = f"{instance_url}/services/data/{SF_API_VERSION}{path}"
-    resp = requests.post(url, headers={
+    resp = _session.post(url, headers={
         "Authorization": f"Bearer {access_token}",
         "Content-Type": "application/json",
     }, json=body, timeout=SF_REQUEST_TIMEOUT)
@@ -258,7 +304,7 @@ def sf_api_post(path, body):
         _invalidate_token_cache()
         access_token, instance_url = get_salesforce_credentials()
         url = f"{instance_url}/services/data/{SF_API_VERSION}{path}"
-        resp = requests.post(url, headers={
+        resp = _session.post(url, headers={
             "Authorization": f"Bearer {access_token}",
             "Content-Type": "application/json",
         }, json=body, timeout=SF_REQUEST_TIMEOUT)
@@ -285,10 +331,34 @@ def sf_query_all(soql):
     return records
 
 
+SOBJECTS_CACHE_TTL = 300  # seconds — describe-global output barely changes
+
+_sobjects_cache = {"at": 0.0, "objects": [], "lowered": []}
+
+
+def _get_sobjects_cached():
+    """Describe-global result plus pre-lowercased match keys, cached 5 min."""
+    if _sobjects_cache["objects"] and time.monotonic() - _sobjects_cache["at"] < SOBJECTS_CACHE_TTL:
+        return _sobjects_cache["objects"], _sobjects_cache["lowered"]
+
+    all_objects = sf_api_get("/sobjects").get("sobjects", [])
+    lowered = [
+        (
+            obj.get("name", "").lower(),
+            obj.get("label", "").lower(),
+            obj.get("labelPlural", "").lower(),
+        )
+        for obj in all_objects
+    ]
+    _sobjects_cache["objects"] = all_objects
+    _sobjects_cache["lowered"] = lowered
+    _sobjects_cache["at"] = time.monotonic()
+    return all_objects, lowered
+
+
 def find_sobjects(keyword):
     """Search for Salesforce objects by keyword in name/label."""
-    sobjects_data = sf_api_get("/sobjects")
-    all_objects = sobjects_data.get("sobjects", [])
+    all_objects, lowered = _get_sobjects_cached()
     keyword_lower = keyword.lower()
     matches = [
         {
@@ -300,10 +370,8 @@ def find_sobjects(keyword):
             "queryable": obj.get("queryable", False),
             "urls": obj.get("urls", {}),
         }
-        for obj in all_objects
-        if keyword_lower in obj.get("name", "").lower()
-        or keyword_lower in obj.get("label", "").lower()
-        or keyword_lower in obj.get("labelPlural", "").lower()
+        for obj, lc in zip(all_objects, lowered)
+        if keyword_lower in lc[0] or keyword_lower in lc[1] or keyword_lower in lc[2]
     ]
     return matches
 
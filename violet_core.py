@@ -3,26 +3,79 @@
 Extracted from violet_sf_sync.py for use in the webhook service.
 """
 
+import atexit
 import logging
+import os
+import queue
+import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from types import MappingProxyType
 import requests
-from salesforce_client import sf_query_all, get_salesforce_credentials
+from requests.adapters import HTTPAdapter, Retry
+
+import dead_letter
+import fastjson
+from salesforce_client import (
+    sf_query_all,
+    get_salesforce_credentials,
+    _invalidate_token_cache,
+)
 
 log = logging.getLogger('violet_core')
 
+# Retry/backoff tunables — overridable from the environment so ops can
+# slow the service down during an SF incident without a code change.
+SF_MAX_RETRIES = int(os.environ.get('SF_MAX_RETRIES', '3'))
+SF_BACKOFF_BASE = float(os.environ.get('SF_BACKOFF_BASE', '0.5'))
+
+# Pooled session for SF creates — keepalive means no TLS handshake per
+# webhook. Retries are delegated to urllib3: it backs off exponentially,
+# covers connection errors and retryable statuses, and honors
+# Retry-After on 429/503 (which Salesforce sends near governor limits).
+# Read timeouts are NOT retried (read=0): the create is not idempotent,
+# and a POST that timed out waiting for the response may already have
+# committed server-side — re-sending it would duplicate the applicant,
+# and nothing downstream would catch it (the dedup check runs before
+# the create).
+_SF_SESSION = requests.Session()
+_SF_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=20,
+    pool_maxsize=100,
+    max_retries=Retry(
+        total=SF_MAX_RETRIES,
+        connect=SF_MAX_RETRIES,
+        read=0,
+        status=SF_MAX_RETRIES,
+        backoff_factor=SF_BACKOFF_BASE,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=frozenset(['POST']),
+        respect_retry_after_header=True,
+    ),
+))
+
+SF_CREATE_TIMEOUT = (5, 120)  # (connect, read) seconds
+
 # Stage assignments in Salesforce
 STAGE_QUALIFIED = 'New Application'
 STAGE_INTERESTED = 'Candidate Interested'
 
-# Minimum qualification levels to sync
-SYNC_QUAL_RESULTS = ('fully_qualified', 'partially_qualified')
-SYNC_INTEREST_LEVELS = ('very_interested', 'somewhat_interested')
+# Minimum qualification levels to sync (frozensets: O(1) membership on a
+# function that runs for 100% of webhooks)
+SYNC_QUAL_RESULTS = frozenset({'fully_qualified', 'partially_qualified'})
+SYNC_INTEREST_LEVELS = frozenset({'very_interested', 'somewhat_interested'})
 
 # Agents to skip (no longer active or no job data)
-SKIP_AGENTS = {
+SKIP_AGENTS = frozenset({
     'SMS Violet - EMR Trainer Outreach',
     'Violet - MedPro Inbound Lead Agent',
-}
+})
+
+# Shared read-only sentinel for absent dicts — the `... or {}` idiom
+# allocated a fresh empty dict on every webhook.
+_EMPTY = MappingProxyType({})
 
 
 def classify_chat(chat):
@@ -32,17 +85,17 @@ def classify_chat(chat):
         ('qualified', stage) | ('interested', stage) | ('skip', reason)
     """
     agent = chat.get('agent_name', '')
-    if agent in SKIP_AGENTS:
+    if agent and agent in SKIP_AGENTS:
         return ('skip', f'agent skipped: {agent}')
 
     # For webhook mode, chat_analyzed events may not have chat_status='ended'
     # but they always have analysis data. Only skip if explicitly ongoing.
-    status = chat.get('chat_status', '')
+    status = chat.get('chat_status')
     if status == 'ongoing':
         return ('skip', 'chat still ongoing')
 
-    ca = chat.get('chat_analysis') or {}
-    custom = ca.get('custom_analysis_data') or {}
+    ca = chat.get('chat_analysis') or _EMPTY
+    custom = ca.get('custom_analysis_data') or _EMPTY
 
     if not custom:
         return ('skip', 'no analysis data')
@@ -61,74 +114,252 @@ def classify_chat(chat):
     return ('skip', f'not qualified/interested (qual={qual}, interest={interest})')
 
 
-def extract_contact_id(chat):
-    """Extract Salesforce Contact ID from chat data."""
-    dv = chat.get('retell_llm_dynamic_variables') or {}
-    meta = chat.get('metadata') or {}
+# One search() pulls the ID out of a record URL and validates its shape
+# at the same time — no intermediate strings, compiled once at import.
+_CONTACT_URL_RE = re.compile(r'/Contact/(003[A-Za-z0-9]{12,15})')
+_JOB_URL_RE = re.compile(r'/AVTRRT__Job__c/(a0F[A-Za-z0-9]{12,15})')
+
 
+def extract_ids(chat):
+    """Extract (contact_id, job_id) from chat data in a single dict walk.
+
+    Missing IDs come back as '' — same convention as the old per-ID
+    helpers, which are kept below as thin wrappers.
+    """
+    dv = chat.get('retell_llm_dynamic_variables') or _EMPTY
+    meta = chat.get('metadata') or _EMPTY
+
+    contact_id = ''
     cid = dv.get('candidate_id', meta.get('candidate_id', ''))
-    if cid and cid.startswith('003') and len(cid) >= 15:
-        return cid
+    if cid and len(cid) >= 15 and cid[:3] == '003':
+        contact_id = cid
+    else:
+        url = dv.get('candidate_salesforce_url', '')
+        if url:
+            m = _CONTACT_URL_RE.search(url)
+            if m:
+                contact_id = m.group(1)
 
-    url = dv.get('candidate_salesforce_url', '')
-    if url and '/Contact/' in url:
-        extracted = url.split('/Contact/')[1].split('/')[0]
-        if extracted.startswith('003') and len(extracted) >= 15:
-            return extracted
+    job_id = ''
+    url = dv.get('job_salesforce_url', '')
+    if url:
+        m = _JOB_URL_RE.search(url)
+        if m:
+            job_id = m.group(1)
+    if not job_id:
+        j18 = dv.get('job_ID_18', '')
+        if j18 and j18[:3] == 'a0F':
+            job_id = j18
 
-    return ''
+    return contact_id, job_id
+
+
+def extract_contact_id(chat):
+    """Extract Salesforce Contact ID from chat data."""
+    return extract_ids(chat)[0]
 
 
 def extract_job_id(chat):
     """Extract Salesforce Job ID from chat data."""
-    dv = chat.get('retell_llm_dynamic_variables') or {}
-
-    url = dv.get('job_salesforce_url', '')
-    if url and '/AVTRRT__Job__c/' in url:
-        return url.split('/AVTRRT__Job__c/')[1].split('/')[0]
+    return extract_ids(chat)[1]
+
+
+# ──────────────────────────────────────────────────────────────────────
+# Local dedup cache — known (contact15, job15) pairs with a TTL.
+# Re-fired webhooks and same-candidate retries skip the SOQL round-trip.
+# ──────────────────────────────────────────────────────────────────────
+PAIR_CACHE_TTL = 3600       # seconds a pair stays trusted
+PAIR_CACHE_MAX = 10_000     # bound on cached pairs
+
+_known_pairs = {}           # (cid15, jid15) -> expiry (monotonic)
+_known_pairs_lock = threading.Lock()
+
+
+def _pair_known(pair):
+    """True if the pair was observed (query or create) within the TTL."""
+    exp = _known_pairs.get(pair)
+    if exp is None:
+        return False
+    if time.monotonic() >= exp:
+        with _known_pairs_lock:
+            _known_pairs.pop(pair, None)
+        return False
+    return True
+
+
+def _remember_pair(pair):
+    """Record a pair as existing in SF."""
+    with _known_pairs_lock:
+        if len(_known_pairs) >= PAIR_CACHE_MAX:
+            # Evict expired entries first, then oldest-inserted as needed
+            now = time.monotonic()
+            for k in [k for k, exp in _known_pairs.items() if exp <= now]:
+                del _known_pairs[k]
+            while len(_known_pairs) >= PAIR_CACHE_MAX:
+                del _known_pairs[next(iter(_known_pairs))]
+        _known_pairs[pair] = time.monotonic() + PAIR_CACHE_TTL
+
+
+# ──────────────────────────────────────────────────────────────────────
+# Per-chat result cache — RetellAI retries webhooks on 5xx/network
+# errors, and without this every replay re-runs classify + dedup SOQL
+# and may race a duplicate create. A replayed chat_id gets its prior
+# result back immediately instead. Errors are never cached so retries
+# (sender or dead-letter replay) still get a real attempt.
+# ──────────────────────────────────────────────────────────────────────
+CHAT_RESULT_TTL = 3600      # seconds a chat_id result stays replayable
+CHAT_RESULT_MAX = 50_000    # bound on cached results
+
+_chat_results = {}          # chat_id -> (expiry (monotonic), result)
+_chat_results_lock = threading.Lock()
+
+
+def _cached_result(chat_id):
+    """Return the cached result for a chat_id, or None."""
+    if not chat_id or chat_id == 'unknown':
+        # No real chat_id — distinct chats would collide on one key and
+        # replay each other's results
+        return None
+    entry = _chat_results.get(chat_id)
+    if entry is None:
+        return None
+    if time.monotonic() >= entry[0]:
+        with _chat_results_lock:
+            _chat_results.pop(chat_id, None)
+        return None
+    return entry[1]
+
+
+def _remember_result(chat_id, result):
+    """Cache a final (non-error) result for webhook replays."""
+    if not chat_id or chat_id == 'unknown':
+        return
+    if result.get('action') == 'error':
+        return
+    with _chat_results_lock:
+        if len(_chat_results) >= CHAT_RESULT_MAX:
+            now = time.monotonic()
+            for k in [k for k, (exp, _) in _chat_results.items() if exp <= now]:
+                del _chat_results[k]
+            while len(_chat_results) >= CHAT_RESULT_MAX:
+                del _chat_results[next(iter(_chat_results))]
+        _chat_results[chat_id] = (time.monotonic() + CHAT_RESULT_TTL, result)
+
+
+SOQL_ID_BATCH_SIZE = 200  # 200 18-char IDs sit well inside SOQL length limits
+SOQL_BATCH_WORKERS = 8    # parallel dedup batches on bulk paths
+
+_DEDUP_SOQL_PREFIX = (
+    "SELECT AVTRRT__Contact_Candidate__c, AVTRRT__Job__c "
+    "FROM AVTRRT__Job_Applicant__c "
+    "WHERE AVTRRT__Contact_Candidate__c IN ("
+)
+
+
+def _escape_soql(value):
+    """Escape a value for use inside a quoted SOQL string literal.
+
+    IDs coming off webhooks are shape-checked upstream, but the payload
+    is ultimately caller-supplied — escape anyway, defense in depth.
+    """
+    return value.replace('\\', '\\\\').replace("'", "\\'")
 
-    j18 = dv.get('job_ID_18', '')
-    if j18 and j18.startswith('a0F'):
-        return j18
 
-    return ''
+def _query_applicant_batch(batch, job_filter=''):
+    """Run one dedup SOQL batch. Returns the set of existing pairs."""
+    found = set()
+    soql = _DEDUP_SOQL_PREFIX + ",".join("'" + _escape_soql(x) + "'" for x in batch) + ")" + job_filter
+    try:
+        for r in sf_query_all(soql):
+            cc = r.get('AVTRRT__Contact_Candidate__c', '')
+            jj = r.get('AVTRRT__Job__c', '')
+            if cc and jj:
+                found.add((cc[:15], jj[:15]))
+    except Exception as e:
+        log.warning("Dedup query failed for batch: %s", e)
+    return found
 
 
-def check_existing_applicants(contact_ids):
+def check_existing_applicants(contact_ids, job_ids=None):
     """Check which contact IDs already have Job Applicant records.
 
+    IDs are queried 200 per IN list; on bulk paths with multiple batches
+    the SOQLs run in parallel through the pooled session, so total dedup
+    time is roughly one round-trip per worker instead of one per batch.
+
+    Args:
+        contact_ids: contact IDs to look up
+        job_ids: optional job IDs to narrow the query. When given, the
+            SOQL gains a second indexed predicate (AVTRRT__Job__c IN ...)
+            so it stays selective on orgs with millions of applicant rows.
+
     Returns:
         set of (contact_id_15, job_id_15) pairs that exist.
     """
+    job_filter = ''
+    if job_ids:
+        job_filter = (
+            " AND AVTRRT__Job__c IN ("
+            + ",".join("'" + _escape_soql(j) + "'" for j in set(job_ids))
+            + ")"
+        )
+
+    # Chunk the deduplicated IDs straight off the set — no intermediate
+    # list between the set and the per-batch lists.
+    unique_ids = iter(set(contact_ids))
+    batches = []
+    while batch := list(islice(unique_ids, SOQL_ID_BATCH_SIZE)):
+        batches.append(batch)
+
     existing = set()
-    unique_ids = list(set(contact_ids))
+    if len(batches) <= 1:
+        for batch in batches:
+            existing |= _query_applicant_batch(batch, job_filter)
+        return existing
+
+    with ThreadPoolExecutor(max_workers=min(SOQL_BATCH_WORKERS, len(batches))) as ex:
+        for found in ex.map(lambda b: _query_applicant_batch(b, job_filter), batches):
+            existing |= found
+    return existing
 
-    for i in range(0, len(unique_ids), 25):
-        batch = unique_ids[i:i + 25]
-        ids = "','".join(batch)
-        soql = f"SELECT AVTRRT__Contact_Candidate__c, AVTRRT__Job__c FROM AVTRRT__Job_Applicant__c WHERE AVTRRT__Contact_Candidate__c IN ('{ids}')"
-        try:
-            records = sf_query_all(soql)
-            for r in records:
-                cc = r.get('AVTRRT__Contact_Candidate__c', '')
-                jj = r.get('AVTRRT__Job__c', '')
-                if cc and jj:
-                    existing.add((cc[:15], jj[:15]))
-        except Exception as e:
-            log.warning(f"Dedup query failed for batch: {e}")
 
-    return existing
+SF_CREATE_BATCH_SIZE = 200  # composite/sobjects maximum per call
+SF_CREATE_WORKERS = 8       # concurrent chunk POSTs on multi-chunk creates
 
 
-def create_job_applicant(record):
-    """Create a single Job Applicant record in Salesforce.
+def create_job_applicants(records):
+    """Create Job Applicant records in Salesforce, up to 200 per API call.
+
+    Packing records into composite/sobjects batches instead of one POST
+    per record keeps bursts and backfills inside the shared daily API
+    limit. When more than one chunk is needed, the chunks are POSTed
+    concurrently through the shared pooled session, so a large backfill
+    takes roughly one round-trip per worker instead of one per chunk.
 
     Args:
-        record: dict with contact_id, job_id, stage
+        records: list of dicts with contact_id, job_id, stage
 
     Returns:
-        (success: bool, result: dict)
+        list of (success: bool, result: dict), aligned with records
     """
+    chunks = [
+        records[i:i + SF_CREATE_BATCH_SIZE]
+        for i in range(0, len(records), SF_CREATE_BATCH_SIZE)
+    ]
+    if not chunks:
+        return []
+    if len(chunks) == 1:
+        return _create_batch(chunks[0])
+
+    results = []
+    with ThreadPoolExecutor(max_workers=min(SF_CREATE_WORKERS, len(chunks))) as ex:
+        for chunk_results in ex.map(_create_batch, chunks):
+            results.extend(chunk_results)
+    return results
+
+
+def _create_batch(batch):
+    """POST one composite/sobjects chunk and split results back by index."""
     access_token, instance_url = get_salesforce_credentials()
 
     payload = {
@@ -136,10 +367,11 @@ def create_job_applicant(record):
         'records': [
             {
                 'attributes': {'type': 'AVTRRT__Job_Applicant__c'},
-                'AVTRRT__Contact_Candidate__c': record['contact_id'],
-                'AVTRRT__Job__c': record['job_id'],
-                'AVTRRT__Stage__c': record['stage'],
+                'AVTRRT__Contact_Candidate__c': r['contact_id'],
+                'AVTRRT__Job__c': r['job_id'],
+                'AVTRRT__Stage__c': r['stage'],
             }
+            for r in batch
         ],
     }
 
@@ -148,48 +380,97 @@ def create_job_applicant(record):
         'Content-Type': 'application/json',
     }
 
-    for attempt in range(3):
-        try:
-            resp = requests.post(
-                f'{instance_url}/services/data/v59.0/composite/sobjects',
-                headers=headers,
-                json=payload,
-                timeout=120,
-            )
-            break
-        except requests.exceptions.ReadTimeout:
-            log.warning(f"SF timeout, attempt {attempt + 1}/3")
-            if attempt < 2:
-                access_token, instance_url = get_salesforce_credentials()
-                headers['Authorization'] = f'Bearer {access_token}'
-                time.sleep(2)
-            else:
-                return False, {'error': 'timeout after 3 attempts'}
-
-    if resp.status_code == 200:
-        api_results = resp.json()
-        result = api_results[0]
+    # Pre-serialized bytes — skips requests' internal json.dumps pass
+    body = fastjson.dumps(payload)
+
+    try:
+        resp = _SF_SESSION.post(
+            f'{instance_url}/services/data/v59.0/composite/sobjects',
+            headers=headers,
+            data=body,
+            timeout=SF_CREATE_TIMEOUT,
+        )
+    except requests.exceptions.RequestException as e:
+        # urllib3 already retried with backoff — this is the final failure
+        log.error("SF create request failed after retries: %s", e)
+        return [(False, {'error': f'request failed after retries: {e}'})] * len(batch)
+
+    if resp.status_code == 401:
+        # Token expired mid-flight — drop the cached credentials and retry once
+        _invalidate_token_cache()
+        access_token, instance_url = get_salesforce_credentials()
+        headers['Authorization'] = f'Bearer {access_token}'
+        resp = _SF_SESSION.post(
+            f'{instance_url}/services/data/v59.0/composite/sobjects',
+            headers=headers,
+            data=body,
+            timeout=SF_CREATE_TIMEOUT,
+        )
+
+    if resp.status_code != 200:
+        log.error("SF API error %s: %s", resp.status_code, resp.text[:300])
+        return [(False, {'error': f'HTTP {resp.status_code}: {resp.text[:300]}'})] * len(batch)
+
+    out = []
+    for record, result in zip(batch, fastjson.loads(resp.content)):
         if result.get('success'):
-            log.info(f"CREATED: {record['contact_id']} + {record['job_id']} -> {result['id']} ({record.get('tier', '?')})")
-            return True, {'applicant_id': result['id']}
+            log.info("CREATED: %s + %s -> %s (%s)", record['contact_id'], record['job_id'], result['id'], record.get('tier', '?'))
+            out.append((True, {'applicant_id': result['id']}))
         else:
             err = str(result.get('errors', []))
-            log.error(f"SF create failed: {record['contact_id']} + {record['job_id']}: {err}")
-            return False, {'error': err}
-    else:
-        log.error(f"SF API error {resp.status_code}: {resp.text[:300]}")
-        return False, {'error': f'HTTP {resp.status_code}: {resp.text[:300]}'}
+            log.error("SF create failed: %s + %s: %s", record['contact_id'], record['job_id'], err)
+            out.append((False, {'error': err}))
+    return out
 
 
-def process_chat_webhook(chat, notify_fn=None):
-    """Orchestrator: classify -> extract -> dedup -> create -> notify.
+def create_job_applicant(record):
+    """Create a single Job Applicant record in Salesforce.
 
     Args:
-        chat: Full chat object from RetellAI webhook payload
-        notify_fn: Optional callback(event_type, details_dict) for notifications
+        record: dict with contact_id, job_id, stage
 
     Returns:
-        dict with keys: action, detail, contact_id, job_id, sf_result, chat_id
+        (success: bool, result: dict)
+    """
+    return create_job_applicants([record])[0]
+
+
+# Notifications (Slack etc.) are one outbound HTTP POST each — running
+# them inline held the webhook response open for that RTT. They go
+# through a small pool instead; past NOTIFY_MAX_PENDING in-flight they
+# are dropped (the outcome is already in the structured logs, and a lost
+# Slack ping beats a blocked handler when Slack is slow or down).
+NOTIFY_WORKERS = 4
+NOTIFY_MAX_PENDING = 100
+
+_notify_pool = ThreadPoolExecutor(max_workers=NOTIFY_WORKERS, thread_name_prefix='notify')
+_notify_pending = threading.Semaphore(NOTIFY_MAX_PENDING)
+
+
+def _notify(notify_fn, event_type, details):
+    """Dispatch a notification on the background pool (drop if saturated)."""
+    if notify_fn is None:
+        return
+    if not _notify_pending.acquire(blocking=False):
+        log.warning("Notification backlog full — dropping %s notification", event_type)
+        return
+
+    def _run():
+        try:
+            notify_fn(event_type, details)
+        except Exception:
+            log.exception("notify_fn failed")
+        finally:
+            _notify_pending.release()
+
+    _notify_pool.submit(_run)
+
+
+def _classify_and_extract(chat):
+    """Shared front half of the pipeline: classify, extract IDs, build record.
+
+    Returns:
+        (result, record) — record is None when result is a final skip.
     """
     chat_id = chat.get('chat_id', 'unknown')
     result = {'chat_id': chat_id, 'action': None, 'detail': None}
@@ -200,40 +481,30 @@ def process_chat_webhook(chat, notify_fn=None):
     result['detail'] = detail
 
     if action == 'skip':
-        log.info(f"[{chat_id[:12]}] SKIP: {detail}")
-        return result
+        log.info("[%s] SKIP: %s", chat_id[:12], detail)
+        return result, None
 
     # 2. Extract IDs
-    contact_id = extract_contact_id(chat)
-    job_id = extract_job_id(chat)
+    contact_id, job_id = extract_ids(chat)
     result['contact_id'] = contact_id
     result['job_id'] = job_id
 
     if not contact_id:
         result['action'] = 'skip'
         result['detail'] = 'no contact ID in chat data'
-        log.warning(f"[{chat_id[:12]}] SKIP: no contact ID")
-        return result
+        log.warning("[%s] SKIP: no contact ID", chat_id[:12])
+        return result, None
 
     if not job_id:
         result['action'] = 'skip'
         result['detail'] = 'no job ID in chat data'
-        log.warning(f"[{chat_id[:12]}] SKIP: no job ID")
-        return result
+        log.warning("[%s] SKIP: no job ID", chat_id[:12])
+        return result, None
 
-    # 3. Dedup against Salesforce
-    existing = check_existing_applicants([contact_id])
-    pair = (contact_id[:15], job_id[:15])
-    if pair in existing:
-        result['action'] = 'duplicate'
-        result['detail'] = 'job applicant already exists in SF'
-        log.info(f"[{chat_id[:12]}] DEDUP: {contact_id} + {job_id} already exists")
-        return result
-
-    # 4. Build record and create
-    dv = chat.get('retell_llm_dynamic_variables') or {}
-    ca = chat.get('chat_analysis') or {}
-    custom = ca.get('custom_analysis_data') or {}
+    # 3. Build record
+    dv = chat.get('retell_llm_dynamic_variables') or _EMPTY
+    ca = chat.get('chat_analysis') or _EMPTY
+    custom = ca.get('custom_analysis_data') or _EMPTY
 
     record = {
         'contact_id': contact_id,
@@ -245,23 +516,234 @@ def process_chat_webhook(chat, notify_fn=None):
         'job_desc': f"{dv.get('job_title', '')} in {dv.get('job_city', '')}, {dv.get('job_state', '')}",
         'agent': chat.get('agent_name', ''),
     }
+    return result, record
+
+
+def process_chat_webhook(chat, notify_fn=None):
+    """Orchestrator: classify -> extract -> dedup -> create -> notify.
+
+    Synchronous path — used by dead-letter replays. Live webhooks go
+    through enqueue_chat_webhook below so creates can be batched.
+
+    Args:
+        chat: Full chat object from RetellAI webhook payload
+        notify_fn: Optional callback(event_type, details_dict) for notifications
+
+    Returns:
+        dict with keys: action, detail, contact_id, job_id, sf_result, chat_id
+    """
+    cached = _cached_result(chat.get('chat_id', 'unknown'))
+    if cached is not None:
+        log.info("[%s] REPLAY: returning cached result (%s)", cached['chat_id'][:12], cached['action'])
+        return cached
+
+    result, record = _classify_and_extract(chat)
+    if record is None:
+        _remember_result(result['chat_id'], result)
+        return result
+
+    chat_id = result['chat_id']
+    contact_id = record['contact_id']
+    job_id = record['job_id']
+
+    # Dedup — local pair cache first, then Salesforce
+    pair = (contact_id[:15], job_id[:15])
+    if _pair_known(pair):
+        result['action'] = 'duplicate'
+        result['detail'] = 'job applicant already exists in SF'
+        log.info("[%s] DEDUP (cached): %s + %s already exists", chat_id[:12], contact_id, job_id)
+        _remember_result(chat_id, result)
+        return result
+
+    existing = check_existing_applicants([contact_id], [job_id])
+    for p in existing:
+        _remember_pair(p)
+    if pair in existing:
+        result['action'] = 'duplicate'
+        result['detail'] = 'job applicant already exists in SF'
+        log.info("[%s] DEDUP: %s + %s already exists", chat_id[:12], contact_id, job_id)
+        _remember_result(chat_id, result)
+        return result
 
     success, sf_result = create_job_applicant(record)
     result['sf_result'] = sf_result
 
     if success:
+        _remember_pair(pair)
         result['action'] = 'created'
         result['detail'] = f"Job Applicant {sf_result.get('applicant_id', '')} created"
-        log.info(f"[{chat_id[:12]}] CREATED: {result['detail']}")
+        log.info("[%s] CREATED: %s", chat_id[:12], result['detail'])
 
-        if notify_fn:
-            notify_fn('created', {**record, **sf_result})
+        _notify(notify_fn, 'created', {**record, **sf_result})
     else:
         result['action'] = 'error'
         result['detail'] = sf_result.get('error', 'unknown SF error')
-        log.error(f"[{chat_id[:12]}] ERROR: {result['detail']}")
+        log.error("[%s] ERROR: %s", chat_id[:12], result['detail'])
 
-        if notify_fn:
-            notify_fn('error', {**record, 'error': result['detail']})
+        _notify(notify_fn, 'error', {**record, 'error': result['detail']})
 
+    _remember_result(chat_id, result)
     return result
+
+
+# ══════════════════════════════════════════════════════════════════════
+# BATCHED WEBHOOK SYNC
+# ══════════════════════════════════════════════════════════════════════
+# Records arriving within a short window are coalesced by a background
+# flusher into one dedup SOQL and one composite create, so burst traffic
+# costs 2 API calls per window instead of 2 per webhook.
+FLUSH_INTERVAL = 0.2    # seconds to wait for more records before flushing
+FLUSH_MAX_RECORDS = 50  # flush immediately once this many are waiting
+
+_pending_q = queue.Queue()
+
+
+def enqueue_chat_webhook(chat, notify_fn=None, record_fn=None):
+    """Queue a chat for the batched SF sync instead of syncing inline.
+
+    Classification and ID extraction still happen synchronously (skips
+    are cheap and final); anything that needs the dedup query + create is
+    handed to the flusher. Errors from the flusher go to the dead letter
+    queue directly.
+
+    Args:
+        chat: Full chat object from RetellAI webhook payload
+        notify_fn: Optional callback(event_type, details_dict)
+        record_fn: Optional callback(action, chat_id, detail) fired with
+            the final outcome once the batch flushes
+
+    Returns:
+        dict with keys: action, detail, chat_id ('skip' or 'queued')
+    """
+    cached = _cached_result(chat.get('chat_id', 'unknown'))
+    if cached is not None:
+        log.info("[%s] REPLAY: returning cached result (%s)", cached['chat_id'][:12], cached['action'])
+        return cached
+
+    result, record = _classify_and_extract(chat)
+    if record is None:
+        _remember_result(result['chat_id'], result)
+        return result
+
+    _pending_q.put((chat, record, notify_fn, record_fn))
+    result['action'] = 'queued'
+    result['detail'] = 'awaiting batched SF sync'
+    return result
+
+
+def _report(record_fn, action, chat_id, detail):
+    """Record the final outcome for webhook replays and fire the callback."""
+    _remember_result(chat_id, {'chat_id': chat_id, 'action': action, 'detail': detail})
+    if record_fn:
+        try:
+            record_fn(action, chat_id, detail)
+        except Exception:
+            log.exception("record_fn callback failed")
+
+
+def _flush_batch(batch):
+    """One dedup query + one batched create for everything in the window."""
+    # Pair-cache hits and in-window duplicates never reach the SOQL
+    candidates = []
+    seen = set()
+    for item in batch:
+        chat, record, notify_fn, record_fn = item
+        pair = (record['contact_id'][:15], record['job_id'][:15])
+        if pair in seen or _pair_known(pair):
+            log.info("[%s] DEDUP: %s + %s already exists", record['chat_id'][:12], record['contact_id'], record['job_id'])
+            _report(record_fn, 'duplicate', record['chat_id'], 'job applicant already exists in SF')
+            continue
+        seen.add(pair)
+        candidates.append((item, pair))
+
+    if not candidates:
+        return
+
+    existing = check_existing_applicants(
+        [item[1]['contact_id'] for item, _ in candidates],
+        [item[1]['job_id'] for item, _ in candidates],
+    )
+    for p in existing:
+        _remember_pair(p)
+
+    to_create = []
+    for item, pair in candidates:
+        chat, record, notify_fn, record_fn = item
+        if pair in existing:
+            log.info("[%s] DEDUP: %s + %s already exists", record['chat_id'][:12], record['contact_id'], record['job_id'])
+            _report(record_fn, 'duplicate', record['chat_id'], 'job applicant already exists in SF')
+            continue
+        to_create.append(item)
+
+    if not to_create:
+        return
+
+    results = create_job_applicants([r for _, r, _, _ in to_create])
+
+    for (chat, record, notify_fn, record_fn), (success, sf_result) in zip(to_create, results):
+        chat_id = record['chat_id']
+        if success:
+            _remember_pair((record['contact_id'][:15], record['job_id'][:15]))
+            detail = f"Job Applicant {sf_result.get('applicant_id', '')} created"
+            log.info("[%s] CREATED: %s", chat_id[:12], detail)
+            _notify(notify_fn, 'created', {**record, **sf_result})
+            _report(record_fn, 'created', chat_id, detail)
+        else:
+            detail = sf_result.get('error', 'unknown SF error')
+            log.error("[%s] ERROR: %s", chat_id[:12], detail)
+            dead_letter.append(chat, record, detail)
+            _notify(notify_fn, 'error', {**record, 'error': detail})
+            _report(record_fn, 'error', chat_id, detail)
+
+
+def _flusher_loop():
+    """Daemon thread: block for one record, coalesce a window, flush."""
+    while True:
+        batch = [_pending_q.get()]
+        deadline = time.monotonic() + FLUSH_INTERVAL
+        while len(batch) < FLUSH_MAX_RECORDS:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_pending_q.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        try:
+            _flush_batch(batch)
+        except Exception as e:
+            # No lead is ever lost — anything we couldn't sync goes to the DLQ
+            log.exception("Batch flush failed — dead-lettering batch")
+            for chat, record, notify_fn, record_fn in batch:
+                dead_letter.append(chat, record, f'batch flush failed: {e}')
+                _report(record_fn, 'error', record['chat_id'], f'batch flush failed: {e}')
+
+
+def _drain_pending():
+    """Dead-letter whatever is still waiting in the batching window.
+
+    Webhooks are ACKed before the record is durable anywhere — it can
+    sit in _pending_q for up to FLUSH_INTERVAL, and the flusher is a
+    daemon thread with no shutdown hook, so a clean SIGTERM (every
+    deploy / worker recycle) would drop ACKed records. Registered with
+    atexit so they land in the DLQ for the next retry-failed instead.
+    """
+    drained = 0
+    while True:
+        try:
+            chat, record, notify_fn, record_fn = _pending_q.get_nowait()
+        except queue.Empty:
+            break
+        dead_letter.append(chat, record, 'shutdown before batched sync')
+        _report(record_fn, 'error', record['chat_id'], 'shutdown before batched sync')
+        drained += 1
+    if drained:
+        log.warning("Shutdown with %d unflushed records — dead-lettered for replay", drained)
+
+
+_flusher = threading.Thread(target=_flusher_loop, name='sf-batch-flusher', daemon=True)
+_flusher.start()
+# Registered after dead_letter is imported, so at exit (LIFO) this runs
+# before dead_letter's own flush() and the appends still reach disk.
+atexit.register(_drain_pending)